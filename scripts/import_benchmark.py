@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for alarm_gateway based on ``python -X importtime``.
+
+Runs ``import alarm_gateway`` in fresh interpreters, reports the median cumulative
+import time, the slowest imported modules and whether heavy dependencies were
+loaded eagerly. With --budget-ms the script exits non-zero if the median exceeds
+the budget (useful in CI).
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("requests", "http.server", "subprocess")
+PROBE = "import sys, alarm_gateway; print(','.join(m for m in {mods!r} if m in sys.modules))"
+
+
+def run_once() -> Tuple[Dict[str, int], List[str]]:
+    env = dict(os.environ)
+    env["ALARM_GATEWAY_ENV_FILE"] = os.devnull
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(mods=LAZY_MODULES)],
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cum_raw, name = line[len("import time:"):].split("|", 2)
+            micros = int(cum_raw.strip())
+        except ValueError:
+            continue
+        if name.strip() == "site":
+            # Everything up to here is interpreter startup, not caused by alarm_gateway.
+            cumulative.clear()
+            continue
+        cumulative[name.strip()] = micros
+    eager = [m for m in result.stdout.strip().split(",") if m]
+    return cumulative, eager
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=0.0, help="Fail if median import time exceeds this budget")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(max(1, args.runs))]
+    totals = [cum.get("alarm_gateway", 0) / 1000.0 for cum, _ in runs]
+    median_ms = statistics.median(totals)
+    slowest, eager = runs[totals.index(sorted(totals)[len(totals) // 2])]
+
+    print(f"alarm_gateway import: median {median_ms:.1f} ms over {len(totals)} run(s) (min {min(totals):.1f}, max {max(totals):.1f})")
+    print("Slowest modules (cumulative):")
+    for name, micros in sorted(slowest.items(), key=lambda x: x[1], reverse=True)[: args.top]:
+        print(f"  {micros / 1000.0:8.1f} ms  {name}")
+    print("Eagerly imported heavy modules: " + (", ".join(eager) if eager else "none"))
+
+    if args.budget_ms and median_ms > args.budget_ms:
+        print(f"FAIL: median {median_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+import importlib
+import unittest
+
+
+class AlarmRecordTests(unittest.TestCase):
+    def setUp(self):
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def test_record_matches_dict_helpers(self):
+        alarms = [
+            {'id': '7', 'title': 'B3 Wohnhaus', 'address': 'Hauptstr. 1', 'text': 'Rauch', 'url': 'https://x', 'date': '2024-01-01T12:00:00Z'},
+            {'Stichwort': 'THL', 'Ort': 'Musterweg', 'Beschreibung': 'Baum auf Straße'},
+            {'ts_create': 5},
+        ]
+        for idx, alarm in enumerate(alarms):
+            record = self.module.AlarmRecord(alarm, idx)
+            self.assertEqual(record.fingerprint, self.module.fingerprint(alarm))
+            self.assertEqual(record.dedup_key, self.module.alarm_dedup_key(alarm))
+            self.assertEqual(record.format(), self.module.format_alarm(alarm))
+            self.assertEqual(record.sort_key, self.module._alarm_sort_key(alarm, idx))
+            self.assertIs(record.raw, alarm)
+
+    def test_record_has_no_instance_dict(self):
+        record = self.module.AlarmRecord({'id': '1', 'title': 'Test'})
+        with self.assertRaises(AttributeError):
+            record.unexpected = True
+
+    def test_record_ordering_matches_dict_helpers(self):
+        data = {'alarms': [
+            {'id': '1', 'title': 'Alt', 'ts_update': 100},
+            {'id': '2', 'title': 'Neu', 'ts_update': 300},
+            {'id': '3', 'title': 'Mitte', 'ts_update': 200},
+        ]}
+        records = self.module.sort_records_oldest_first(self.module.extract_alarm_records(data))
+        self.assertEqual([r.alarm_id for r in records], ['1', '3', '2'])
+        self.assertEqual(self.module.pick_latest_record(records).alarm_id, '2')
+        self.assertEqual(
+            self.module.pick_latest_alarm(self.module.get_alarms_list(data)).get('id'),
+            self.module.pick_latest_record(records).alarm_id,
+        )
+
+    def test_key_cache_reuses_hashes_across_polls(self):
+        cache = self.module.ALARM_KEY_CACHE
+        alarm = {'id': '7', 'title': 'B3', 'address': 'Hauptstr. 1', 'ts_update': 100}
+        first = self.module.AlarmRecord(alarm)
+        self.assertEqual(first.fingerprint, self.module.fingerprint(alarm))
+        second = self.module.AlarmRecord(dict(alarm))
+        self.assertEqual(second.fingerprint, first.fingerprint)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+        changed = dict(alarm, address='Nebenstr. 2', ts_update=101)
+        self.assertEqual(self.module.AlarmRecord(changed).fingerprint, self.module.fingerprint(changed))
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_key_cache_without_update_timestamp_tracks_content(self):
+        alarm = {'title': 'B3', 'address': 'Hauptstr. 1', 'text': 'alt'}
+        self.assertEqual(self.module.AlarmRecord(alarm).dedup_key, self.module.alarm_dedup_key(alarm))
+        edited = dict(alarm, text='neu')
+        self.assertEqual(self.module.AlarmRecord(edited).dedup_key, self.module.alarm_dedup_key(edited))
+        self.assertNotEqual(self.module.alarm_dedup_key(alarm), self.module.alarm_dedup_key(edited))
+
+    def test_key_cache_evicts_least_recently_used(self):
+        cache = self.module.AlarmKeyCache(2)
+        records = [self.module.AlarmRecord({'id': str(i), 'ts_update': 1}) for i in range(3)]
+        cache.lookup(records[0])
+        cache.lookup(records[1])
+        cache.lookup(records[0])
+        cache.lookup(records[2])
+        self.assertEqual(cache.stats()['entries'], 2)
+        cache.lookup(records[1])
+        self.assertEqual(cache.stats()['misses'], 4)
+        cache.lookup(records[2])
+        self.assertEqual(cache.stats()['hits'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
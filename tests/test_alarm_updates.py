@@ -0,0 +1,99 @@
+import importlib
+import unittest
+
+
+class AlarmUpdateTests(unittest.TestCase):
+    def setUp(self):
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def _records(self, alarms):
+        return self.module.extract_alarm_records({'alarms': alarms})
+
+    def test_diff_reports_new_updated_and_closed(self):
+        diff = self.module.diff_alarm_snapshots
+        events, snapshots = diff({}, self._records([
+            {'id': '1', 'title': 'B3', 'address': 'Hauptstr. 1', 'ts_update': 10},
+            {'id': '2', 'title': 'TH', 'ts_update': 10},
+            {'title': 'ohne ID'},
+        ]))
+        self.assertEqual([(e.kind, e.key) for e in events], [('new', 'id:1'), ('new', 'id:2')])
+
+        events, snapshots = diff(snapshots, self._records([
+            {'id': '1', 'title': 'B3', 'address': 'Nebenstr. 2', 'ts_update': 11},
+        ]))
+        self.assertEqual([(e.kind, e.key) for e in events], [('updated', 'id:1'), ('closed', 'id:2')])
+        self.assertEqual(events[0].changes, {'address': ('Hauptstr. 1', 'Nebenstr. 2')})
+
+        events, snapshots = diff(snapshots, self._records([
+            {'id': '1', 'title': 'B3', 'address': 'Nebenstr. 2', 'ts_update': 12, 'closed': True},
+        ]))
+        self.assertEqual([e.kind for e in events], ['closed'])
+
+        events, _ = diff(snapshots, [])
+        self.assertEqual(events, [])
+
+    def test_unchanged_ts_update_skips_field_comparison(self):
+        events, snapshots = self.module.diff_alarm_snapshots({}, self._records([{'id': '1', 'title': 'B3', 'ts_update': 10}]))
+        # Same version token: the stored snapshot is reused even if the payload differs.
+        events, again = self.module.diff_alarm_snapshots(snapshots, self._records([{'id': '1', 'title': 'B4', 'ts_update': 10}]))
+        self.assertEqual(events, [])
+        self.assertIs(again['id:1'], snapshots['id:1'])
+
+    def test_followups_are_coalesced_and_rate_limited(self):
+        followups = {}
+        Event = self.module.AlarmEvent
+        queue = self.module.queue_alarm_followup
+        due = self.module.due_alarm_followups
+
+        self.assertFalse(queue(followups, Event('updated', 'id:1', '1', 'B3', {'address': ('A', 'B')}), 100))
+        self.assertEqual(len(due(followups, 100, 60)), 1)
+
+        self.assertFalse(queue(followups, Event('updated', 'id:1', '1', 'B3', {'address': ('B', 'C')}), 110))
+        self.assertTrue(queue(followups, Event('updated', 'id:1', '1', 'B3', {'text': ('', 'mehr Infos')}), 120))
+        self.assertEqual(due(followups, 130, 60), [])
+
+        pending = due(followups, 160, 60)
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(pending[0]['changes'], {'address': ['B', 'C'], 'text': ['', 'mehr Infos']})
+        title, message = self.module.format_alarm_followup(pending[0])
+        self.assertEqual(title, 'Update: B3')
+        self.assertIn('Adresse: C (vorher: B)', message)
+
+    def test_reverted_edit_is_dropped(self):
+        followups = {'id:1': {'sent': 100, 'pending': None}}
+        Event = self.module.AlarmEvent
+        self.module.queue_alarm_followup(followups, Event('updated', 'id:1', '1', 'B3', {'address': ('A', 'B')}), 110)
+        self.module.queue_alarm_followup(followups, Event('updated', 'id:1', '1', 'B3', {'address': ('B', 'A')}), 120)
+        self.assertEqual(self.module.due_alarm_followups(followups, 200, 60), [])
+
+    def test_poll_sends_followup_for_changed_alarm(self):
+        payloads = [
+            {'alarms': [{'id': '5', 'title': 'B3', 'address': 'Hauptstr. 1', 'ts_update': 1}]},
+            {'alarms': [{'id': '5', 'title': 'B3', 'address': 'Hauptstr. 3', 'ts_update': 2}]},
+            {'alarms': []},
+        ]
+        sent = []
+        state = self.module.load_state('/tmp/nonexistent-state.json')
+        old = (self.module.fetch_alarms, self.module.publish_message, self.module.save_state, self.module.resolve_cluster_status)
+        try:
+            self.module.fetch_alarms = lambda: payloads.pop(0)
+            self.module.publish_message = lambda _state, title, msg, priority_override=None, **_kwargs: sent.append((title, msg))
+            self.module.save_state = lambda *_args, **_kwargs: None
+            self.module.resolve_cluster_status = lambda force_refresh=False: {'leader_id': self.module.NODE_ID}
+            self.module.ALARM_FOLLOWUP_MIN_INTERVAL_SECONDS = 0
+            for _ in range(3):
+                self.module.handle_divera_poll(state)
+        finally:
+            (self.module.fetch_alarms, self.module.publish_message, self.module.save_state, self.module.resolve_cluster_status) = old
+
+        self.assertEqual([title for title, _ in sent], ['B3', 'Update: B3', 'Beendet: B3'])
+        self.assertIn('Adresse: Hauptstr. 3 (vorher: Hauptstr. 1)', sent[1][1])
+        self.assertEqual(state['alarm_snapshots'], {})
+        metrics = self.module.metrics_snapshot()
+        self.assertEqual(metrics['alarm_updated'], 1)
+        self.assertEqual(metrics['alarm_closed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import gzip
+import importlib
+import json
+import os
+import queue
+import tempfile
+import unittest
+
+
+class AuditLogTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'logs', 'audit.jsonl')
+        os.environ['AUDIT_LOG_FILE'] = self.path
+        self.addCleanup(os.environ.pop, 'AUDIT_LOG_FILE', None)
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def _lines(self, path):
+        with open(path, 'r', encoding='utf-8') as handle:
+            return [json.loads(line) for line in handle]
+
+    def test_events_are_written_by_background_thread(self):
+        for index in range(50):
+            self.module.audit_log('ntfy_sent', {'n': index})
+        self.assertTrue(self.module.AUDIT_WRITER.flush())
+
+        entries = self._lines(self.path)
+        self.assertEqual([e['payload']['n'] for e in entries], list(range(50)))
+        self.assertEqual(entries[0]['event'], 'ntfy_sent')
+        self.assertEqual(entries[0]['node_id'], self.module.NODE_ID)
+
+    def test_size_rotation_with_compression(self):
+        self.module.AUDIT_ROTATE_BYTES = 200
+        self.module.AUDIT_ROTATE_KEEP = 2
+        self.module.AUDIT_ROTATE_COMPRESS = True
+        for index in range(4):
+            self.module.audit_log('event', {'n': index, 'pad': 'x' * 200})
+            self.assertTrue(self.module.AUDIT_WRITER.flush())
+
+        self.assertEqual([e['payload']['n'] for e in self._lines(self.path)], [3])
+        with gzip.open(self.path + '.1.gz', 'rt', encoding='utf-8') as handle:
+            self.assertEqual(json.loads(handle.readline())['payload']['n'], 2)
+        self.assertTrue(os.path.exists(self.path + '.2.gz'))
+        self.assertFalse(os.path.exists(self.path + '.3.gz'))
+        self.assertEqual(self.module.metrics_snapshot()['audit_rotated'], 3)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        writer = self.module.AuditWriter()
+        writer._queue = queue.Queue(maxsize=1)
+        writer._thread = object()  # no consumer: the queue stays full
+        writer.submit({'event': 'a'})
+        writer.submit({'event': 'b'})
+        self.assertEqual(self.module.metrics_snapshot()['audit_dropped'], 1)
+
+    def test_disabled_audit_log_starts_no_thread(self):
+        self.module.AUDIT_LOG_FILE = ''
+        self.module.audit_log('event', {})
+        self.assertIsNone(self.module.AUDIT_WRITER._thread)
+
+
+if __name__ == '__main__':
+    unittest.main()
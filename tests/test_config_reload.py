@@ -0,0 +1,95 @@
+import importlib
+import os
+import tempfile
+import unittest
+
+
+class ConfigReloadTests(unittest.TestCase):
+    def setUp(self):
+        self.saved_environ = dict(os.environ)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env_file = os.path.join(self.tmp.name, 'alarm-gateway.env')
+        os.environ['ALARM_GATEWAY_ENV_FILE'] = self.env_file
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['NTFY_PRIORITY_KEYWORDS'] = 'MANV=4'
+        os.environ['NTFY_DEFAULT_PRIORITY'] = '3'
+        os.environ['WEBHOOK_REPLAY_PROTECTION'] = 'false'
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.saved_environ)
+        self.tmp.cleanup()
+
+    def _write_env(self, content):
+        with open(self.env_file, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+
+    def test_reload_rebuilds_only_affected_components(self):
+        self._write_env('NTFY_PRIORITY_KEYWORDS="Probealarm=1"\n')
+        self.assertEqual(self.module.resolve_ntfy_priority('Probealarm'), '3')
+
+        summary = self.module.reload_config('test')
+
+        self.assertEqual(summary['changed'], ['NTFY_PRIORITY_KEYWORDS'])
+        self.assertEqual(summary['rebuilt'], ['priority_matcher'])
+        self.assertEqual(summary['restart_required'], [])
+        self.assertEqual(self.module.resolve_ntfy_priority('Probealarm'), '1')
+        self.assertEqual(self.module.resolve_ntfy_priority('MANV'), '3')
+
+    def test_reload_swaps_targets_and_flags_restart_settings(self):
+        self._write_env('NTFY_FALLBACK_URLS="https://backup.example"\nWEBHOOK_PORT="9090"\n')
+        summary = self.module.reload_config('test')
+
+        self.assertIn('ntfy_targets', summary['rebuilt'])
+        self.assertEqual(self.module.NTFY_TARGETS, ['https://primary.example', 'https://backup.example'])
+        self.assertEqual(summary['restart_required'], ['WEBHOOK_PORT'])
+
+    def test_invalid_reload_keeps_previous_settings(self):
+        before = self.module.NTFY_RETRY_ATTEMPTS
+        self._write_env('NTFY_RETRY_ATTEMPTS="0"\n')
+        with self.assertRaises(ValueError):
+            self.module.reload_config('test')
+        self.assertEqual(self.module.NTFY_RETRY_ATTEMPTS, before)
+        self.assertEqual(self.module.SETTINGS['NTFY_RETRY_ATTEMPTS'], before)
+
+    def test_invalid_reload_is_never_published_and_restores_the_environment(self):
+        environ_before = dict(os.environ)
+        seen = []
+        validate = self.module.validate_runtime_config
+        self.module.validate_runtime_config = lambda settings=None: (seen.append(self.module.NTFY_TOPIC), validate(settings))
+        self.addCleanup(setattr, self.module, 'validate_runtime_config', validate)
+        self._write_env('NTFY_TOPIC="other"\nNTFY_RETRY_ATTEMPTS="0"\n')
+
+        with self.assertRaises(ValueError):
+            self.module.reload_config('test')
+
+        self.assertEqual(seen, ['topic'])
+        self.assertEqual(self.module.NTFY_TOPIC, 'topic')
+        self.assertEqual(dict(os.environ), environ_before)
+
+    def test_apply_web_config_restores_file_on_invalid_values(self):
+        with self.assertRaises(ValueError):
+            self.module.apply_web_config({'WEBHOOK_PATH': 'no-leading-slash'})
+
+        self.assertEqual(self.module.WEBHOOK_PATH, '/webhook/alarm')
+        with open(self.env_file, 'r', encoding='utf-8') as handle:
+            self.assertIn('WEBHOOK_PATH="/webhook/alarm"', handle.read())
+        self.assertEqual(os.environ['WEBHOOK_PATH'], '/webhook/alarm')
+
+    def test_keys_deleted_from_the_env_file_fall_back_to_defaults(self):
+        self._write_env('NTFY_FALLBACK_URLS="https://backup.example"\nNTFY_RETRY_ATTEMPTS="4"\n')
+        self.module.reload_config('test')
+        self.assertEqual(self.module.NTFY_RETRY_ATTEMPTS, 4)
+
+        self._write_env('NTFY_RETRY_ATTEMPTS="4"\n')
+        summary = self.module.reload_config('test')
+        self.assertEqual(summary['changed'], ['NTFY_FALLBACK_URLS'])
+        self.assertNotIn('NTFY_FALLBACK_URLS', os.environ)
+        self.assertEqual(self.module.NTFY_TARGETS, ['https://primary.example'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -234,12 +234,12 @@ class DeliveryAndSecurityTests(unittest.TestCase):
             self.module.subprocess.run = old_run
 
     def test_render_config_page_shows_update_status(self):
-        old_get_update = self.module.get_update_availability
+        old_get_update = self.module.cached_update_availability
         try:
-            self.module.get_update_availability = lambda: ('available', 'Neue Version gefunden')
+            self.module.cached_update_availability = lambda: ('available', 'Neue Version gefunden')
             html = self.module.render_config_page(auth_token='abc123')
         finally:
-            self.module.get_update_availability = old_get_update
+            self.module.cached_update_availability = old_get_update
 
         self.assertIn('>Update<', html)
         self.assertIn('available', html)
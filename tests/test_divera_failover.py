@@ -0,0 +1,83 @@
+import importlib
+import json
+import os
+import unittest
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = json.dumps(body).encode('utf-8')
+        self.headers = {}
+
+    def raise_for_status(self):
+        return None
+
+    def iter_content(self, chunk_size=1):
+        yield self.body
+
+    def close(self):
+        return None
+
+
+class DiveraFailoverTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['DIVERA_URL'] = 'https://primary.divera.example/api/v2/alarms'
+        os.environ['DIVERA_FALLBACK_URL'] = 'https://fallback.divera.example/api/v2/alarms'
+        os.environ['DIVERA_ACCESSKEY'] = 'key'
+        os.environ['DIVERA_CONNECT_TIMEOUT'] = '2'
+        os.environ['DIVERA_READ_TIMEOUT'] = '4'
+        self.addCleanup(self._restore_env)
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.primary_up = False
+        self.calls = []
+        old_get = self.module.requests.get
+        self.module.requests.get = self._get
+        self.addCleanup(setattr, self.module.requests, 'get', old_get)
+
+    def _restore_env(self):
+        for name in ('DIVERA_URL', 'DIVERA_FALLBACK_URL', 'DIVERA_ACCESSKEY', 'DIVERA_CONNECT_TIMEOUT', 'DIVERA_READ_TIMEOUT'):
+            os.environ.pop(name, None)
+
+    def _get(self, url, **kwargs):
+        host = url.split('/')[2]
+        self.calls.append((host, kwargs['timeout']))
+        if host.startswith('primary') and not self.primary_up:
+            raise ConnectionError('primary down')
+        return FakeResponse({'alarms': [{'id': '1', 'title': host}]})
+
+    def test_fetch_sticks_with_fallback_after_failover(self):
+        data = self.module.fetch_alarms()
+        self.assertEqual(data['alarms'][0]['title'], 'fallback.divera.example')
+        self.assertEqual([host for host, _ in self.calls], ['primary.divera.example', 'fallback.divera.example'])
+        self.assertEqual(self.calls[0][1], (2.0, 4.0))
+        self.assertEqual(self.module.DIVERA_ENDPOINTS.active, 'fallback')
+
+        self.calls.clear()
+        self.module.fetch_alarms()
+        self.assertEqual([host for host, _ in self.calls], ['fallback.divera.example'])
+        self.assertEqual(self.module.metrics_snapshot()['divera_failover'], 1)
+
+    def test_probe_switches_back_once_primary_recovers(self):
+        self.module.fetch_alarms()
+        self.assertFalse(self.module.probe_divera_primary())
+        self.assertEqual(self.module.DIVERA_ENDPOINTS.active, 'fallback')
+
+        self.primary_up = True
+        self.assertTrue(self.module.probe_divera_primary())
+        self.calls.clear()
+        data = self.module.fetch_alarms()
+        self.assertEqual(data['alarms'][0]['title'], 'primary.divera.example')
+        self.assertEqual(len(self.calls), 1)
+        self.assertIn('alarm_gateway_divera_active_endpoint{endpoint="primary"} 1', self.module.render_metrics_text())
+
+    def test_probe_is_idle_while_primary_is_active(self):
+        self.primary_up = True
+        self.module.fetch_alarms()
+        self.calls.clear()
+        self.assertFalse(self.module.probe_divera_primary())
+        self.assertEqual(self.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
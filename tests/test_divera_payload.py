@@ -0,0 +1,103 @@
+import importlib
+import json
+import unittest
+
+
+class FakeStreamResponse:
+    def __init__(self, body, content_length=None):
+        self.body = body
+        self.headers = {} if content_length is None else {'Content-Length': str(content_length)}
+        self.closed = False
+
+    def raise_for_status(self):
+        return None
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class DiveraPayloadTests(unittest.TestCase):
+    def setUp(self):
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def test_prunes_everything_but_alarm_subtrees(self):
+        payload = {
+            'success': True,
+            'data': {
+                'items': {'7': {'id': 7, 'title': 'B3 {brennt} [x]', 'text': 'say "hi" \\ ok'}},
+                'sorting': [7],
+                'cluster': {'users': [{'name': 'a}]"b', 'tags': [1, {'x': None}]}] * 50},
+            },
+            'ucr': [1, 2, 3],
+        }
+        parsed = self.module.parse_divera_payload(json.dumps(payload))
+
+        self.assertEqual(parsed, {'data': {'items': payload['data']['items'], 'sorting': [7]}})
+        alarms = self.module.get_alarms_list(parsed)
+        self.assertEqual([a['title'] for a in alarms], ['B3 {brennt} [x]'])
+
+    def test_unknown_layout_falls_back_to_full_parse(self):
+        payload = {'payload': {'einsatz': {'id': '1', 'title': 'Tief verschachtelt'}}}
+        parsed = self.module.parse_divera_payload(json.dumps(payload))
+        self.assertEqual(parsed, payload)
+        self.assertEqual(len(self.module.get_alarms_list(parsed)), 1)
+
+    def test_nested_layouts_find_the_same_alarms_as_a_full_parse(self):
+        alarm = {'id': 9, 'title': 'THL Person', 'date': 1700000000}
+        layouts = [
+            {'success': True, 'data': {'active': {'items': {'9': alarm}}}},
+            {'success': True, 'data': {'alarms': {'9': alarm}}},
+            {'data': {'cluster': {'name': 'FF'}}, 'payload': {'alarm': alarm}},
+        ]
+        for payload in layouts:
+            text = json.dumps(payload)
+            with self.subTest(payload=payload):
+                expected = self.module.get_alarms_list(json.loads(text))
+                self.assertEqual(len(expected), 1)
+                self.assertEqual(self.module.get_alarms_list(self.module.parse_divera_payload(text)), expected)
+
+    def test_rejects_trailing_garbage(self):
+        with self.assertRaises(ValueError):
+            self.module.parse_divera_payload('{"data": {"items": {}}} trailing')
+        with self.assertRaises(ValueError):
+            self.module.parse_divera_payload('{"other": [1, 2')
+
+    def test_read_limited_body_enforces_limit(self):
+        self.assertEqual(self.module.read_limited_body(FakeStreamResponse(b'x' * 100), 100), b'x' * 100)
+        with self.assertRaises(ValueError):
+            self.module.read_limited_body(FakeStreamResponse(b'x' * 101), 100)
+        with self.assertRaises(ValueError):
+            self.module.read_limited_body(FakeStreamResponse(b'', content_length=5000), 100)
+
+    def test_fetch_alarms_streams_and_closes_response(self):
+        body = json.dumps({'data': {'items': {'1': {'title': 'Test'}}, 'sorting': ['1']}, 'junk': list(range(100))}).encode('utf-8')
+        response = FakeStreamResponse(body)
+        calls = []
+
+        def fake_get(url, **kwargs):
+            calls.append(kwargs)
+            return response
+
+        old_get = self.module.requests.get
+        old_key = self.module.DIVERA_ACCESSKEY
+        try:
+            self.module.requests.get = fake_get
+            self.module.DIVERA_ACCESSKEY = 'key'
+            data = self.module.fetch_alarms()
+        finally:
+            self.module.requests.get = old_get
+            self.module.DIVERA_ACCESSKEY = old_key
+
+        self.assertTrue(calls[0]['stream'])
+        self.assertTrue(response.closed)
+        self.assertNotIn('junk', data)
+        self.assertEqual(self.module.get_alarms_list(data)[0]['id'], '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import importlib
+import json
+import os
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+
+class DiveraPushTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['WEBHOOK_TOKEN'] = 'secret-token'
+        os.environ['WEBHOOK_REPLAY_PROTECTION'] = 'false'
+        os.environ['DIVERA_PUSH_ENABLED'] = 'true'
+        os.environ['LIVE_FEED_ENABLED'] = 'true'
+        self.addCleanup(os.environ.pop, 'DIVERA_PUSH_ENABLED', None)
+        self.addCleanup(os.environ.pop, 'LIVE_FEED_ENABLED', None)
+        self.addCleanup(os.environ.pop, 'WEBHOOK_TOKEN', None)
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.sent = []
+        self.state = self.module.load_state('/tmp/nonexistent-state.json')
+        self.leader = self.module.NODE_ID
+        patches = {
+            'publish_message': lambda _state, title, msg, priority_override=None, **_kwargs: self.sent.append(title),
+            'save_state': lambda *_args, **_kwargs: None,
+            'resolve_cluster_status': lambda force_refresh=False: {'leader_id': self.leader},
+            'is_active_sender': lambda: self.leader == self.module.NODE_ID,
+        }
+        for name, value in patches.items():
+            self.addCleanup(setattr, self.module, name, getattr(self.module, name))
+            setattr(self.module, name, value)
+
+    def test_bare_and_wrapped_alarm_payloads_are_recognised(self):
+        extract = self.module.extract_pushed_alarm_records
+        self.assertEqual(extract({'id': 9, 'title': 'B3'})[0].alarm_id, '9')
+        self.assertEqual(extract({'success': True, 'data': {'id': 9, 'title': 'B3'}})[0].title, 'B3')
+        self.assertEqual(extract({'alarms': [{'id': 1, 'title': 'A'}, {'id': 2, 'title': 'B'}]})[1].alarm_id, '2')
+        self.assertEqual(extract({'foo': 'bar'}), [])
+
+    def test_alarm_from_push_and_poll_is_sent_once(self):
+        alarm = {'id': 42, 'title': 'B3 Wohnhaus', 'address': 'Hauptstr. 1', 'ts_update': 5}
+        result = self.module.handle_divera_push(alarm, self.state)
+        self.assertEqual(result, {'status': 'ok', 'alarms': 1, 'sent': 1})
+
+        self.module.fetch_alarms = lambda: {'alarms': [dict(alarm), {'id': 43, 'title': 'TH'}]}
+        self.module.handle_divera_poll(self.state)
+        self.assertEqual(self.sent, ['B3 Wohnhaus', 'TH'])
+        self.assertEqual(self.module.metrics_snapshot()['divera_poll_reconciled'], 1)
+
+        self.module.handle_divera_push(alarm, self.state)
+        self.assertEqual(self.sent, ['B3 Wohnhaus', 'TH'])
+
+        events, _, _ = self.module.LIVE_FEED.wait(0, timeout=0)
+        self.assertEqual([(event['alarm_id'], event['source']) for _, event, _ in events], [('42', 'push'), ('43', 'poll')])
+
+    def test_push_does_not_close_other_alarms(self):
+        self.module.fetch_alarms = lambda: {'alarms': [{'id': 1, 'title': 'A', 'ts_update': 1}]}
+        self.module.handle_divera_poll(self.state)
+        self.module.handle_divera_push({'id': 2, 'title': 'B', 'ts_update': 1}, self.state)
+        self.assertEqual(set(self.state['alarm_snapshots']), {'id:1', 'id:2'})
+        self.assertEqual(set(self.state['active_alarm_keys']), {'id:1', 'id:2'})
+
+        # Poll has not caught up with the pushed alarm yet: no closure within the grace period.
+        self.module.handle_divera_poll(self.state)
+        self.assertIn('id:2', self.state['alarm_snapshots'])
+        self.assertEqual(self.sent, ['A', 'B'])
+
+    def test_standby_node_does_not_send(self):
+        self.leader = 'other-node'
+        result = self.module.handle_divera_push({'id': 7, 'title': 'B3'}, self.state)
+        self.assertEqual(result['status'], 'standby')
+        self.assertEqual(self.sent, [])
+
+    def test_push_route_requires_token(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), self.module.make_webhook_handler(self.state))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_address[1]}/webhook/divera"
+        body = json.dumps({'id': 11, 'title': 'B2'}).encode('utf-8')
+
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(urllib.request.Request(base, data=body, method='POST'), timeout=5)
+        self.assertEqual(ctx.exception.code, 401)
+
+        request = urllib.request.Request(f"{base}?token=secret-token", data=body, method='POST')
+        with urllib.request.urlopen(request, timeout=5) as resp:
+            self.assertEqual(json.loads(resp.read()), {'status': 'ok', 'alarms': 1, 'sent': 1})
+        self.assertEqual(self.sent, ['B2'])
+
+    def test_push_route_applies_replay_protection(self):
+        self.module.WEBHOOK_REPLAY_PROTECTION = True
+        self.module.WEBHOOK_HMAC_SECRET = 'hmac-secret'
+        server = ThreadingHTTPServer(('127.0.0.1', 0), self.module.make_webhook_handler(self.state))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/webhook/divera?token=secret-token"
+        alarm = {'id': 12, 'title': 'B3', 'address': 'Hauptstr. 1'}
+        body = json.dumps(alarm).encode('utf-8')
+
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(urllib.request.Request(url, data=body, method='POST'), timeout=5)
+        self.assertEqual(ctx.exception.code, 400)
+        self.assertEqual(self.sent, [])
+
+        ts = int(time.time())
+        headers = {'X-Webhook-Timestamp': str(ts), 'X-Webhook-Signature': self.module._build_webhook_signature(alarm, ts)}
+        with urllib.request.urlopen(urllib.request.Request(url, data=body, method='POST', headers=headers), timeout=5) as resp:
+            self.assertEqual(resp.status, 200)
+        self.assertEqual(self.sent, ['B3'])
+
+    def test_reconcile_interval_replaces_poll_interval(self):
+        self.assertEqual(self.module.current_poll_interval(), self.module.DIVERA_RECONCILE_SECONDS)
+        self.module.DIVERA_PUSH_ENABLED = False
+        self.assertEqual(self.module.current_poll_interval(), self.module.POLL_SECONDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
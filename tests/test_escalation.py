@@ -0,0 +1,173 @@
+import importlib
+import json
+import os
+import random
+import threading
+import unittest
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+
+class TimerWheelTests(unittest.TestCase):
+    def setUp(self):
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def test_thousands_of_timers_fire_once_in_order(self):
+        wheel = self.module.TimerWheel(slots=64)
+        rng = random.Random(4)
+        due = {f'a{i}': 1000 + rng.uniform(0, 300) for i in range(5000)}
+        for key, when in due.items():
+            wheel.schedule(key, when)
+        cancelled = {f'a{i}' for i in range(0, 5000, 7)}
+        for key in cancelled:
+            self.assertTrue(wheel.cancel(key))
+        self.assertEqual(len(wheel), 5000 - len(cancelled))
+
+        fired = []
+        now = 990.0
+        while now < 1400:
+            batch = wheel.advance(now)
+            self.assertTrue(all(due[key] <= now for key in batch))
+            self.assertEqual(batch, sorted(batch, key=due.get))
+            fired.extend(batch)
+            now += 0.5
+        self.assertEqual(sorted(fired), sorted(set(due) - cancelled))
+        self.assertEqual(len(wheel), 0)
+
+    def test_long_gap_still_fires_overdue_timers(self):
+        wheel = self.module.TimerWheel(slots=8)
+        wheel.advance(100)
+        wheel.schedule('late', 105)
+        wheel.schedule('later', 5000)
+        self.assertEqual(wheel.advance(1000), ['late'])
+        self.assertEqual(wheel.advance(5000), ['later'])
+
+
+class EscalationTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['WEBHOOK_TOKEN'] = 'secret-token'
+        os.environ['ESCALATION_AFTER_SECONDS'] = '60'
+        os.environ['ESCALATION_STEPS'] = '2'
+        os.environ['ESCALATION_TOPIC'] = 'leitstelle'
+        os.environ['ESCALATION_ACK_URL'] = 'https://gateway.example/ack'
+        os.environ['NTFY_PUBLISH_MODE'] = 'json'
+        for key in ('WEBHOOK_TOKEN', 'ESCALATION_AFTER_SECONDS', 'ESCALATION_STEPS', 'ESCALATION_TOPIC',
+                    'ESCALATION_ACK_URL', 'NTFY_PUBLISH_MODE'):
+            self.addCleanup(os.environ.pop, key, None)
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.pushes = []
+        self.escalations = []
+        patches = {
+            'publish_message': lambda _state, title, msg, priority_override=None, extras=None, **_kwargs: self.pushes.append((title, extras)),
+            'ntfy_publish': lambda title, msg, priority=None, extras=None, topic='', **_kwargs: self.escalations.append((title, priority, topic)),
+            'save_state': lambda *_args, **_kwargs: None,
+        }
+        for name, value in patches.items():
+            self.addCleanup(setattr, self.module, name, getattr(self.module, name))
+            setattr(self.module, name, value)
+        self.state = self.module.load_state('/tmp/nonexistent-state.json')
+
+    def _ingest(self, *alarms):
+        self.module.ingest_alarm_records(self.state, [self.module.AlarmRecord(alarm) for alarm in alarms])
+
+    def test_unacknowledged_alarm_escalates_then_stops(self):
+        self._ingest({'id': 1, 'title': 'B3 Wohnhaus'})
+        ack_action = self.pushes[0][1]['actions'][-1]
+        self.assertEqual(ack_action['label'], 'Quittieren')
+        self.assertIn('alarm=id%3A1', ack_action['url'])
+
+        due = self.state['escalations']['id:1']['due']
+        self.assertEqual(self.module.ESCALATIONS.tick(self.state, due - 1), 0)
+        self.assertEqual(self.module.ESCALATIONS.tick(self.state, due), 1)
+        self.assertEqual(self.module.ESCALATIONS.tick(self.state, due + 60), 1)
+        self.assertEqual(self.module.ESCALATIONS.tick(self.state, due + 120), 0)
+        self.assertEqual(self.escalations, [
+            ('Eskalation 1: B3 Wohnhaus', '5', 'leitstelle'),
+            ('Eskalation 2: B3 Wohnhaus', '5', 'leitstelle'),
+        ])
+        self.assertEqual(self.state['escalations'], {})
+
+    def test_divera_answer_or_closing_acknowledges(self):
+        self._ingest({'id': 1, 'title': 'B3'}, {'id': 2, 'title': 'THL'})
+        self.assertEqual(set(self.state['escalations']), {'id:1', 'id:2'})
+        self._ingest({'id': 1, 'title': 'B3', 'ucr_answered': {'35': {'812': {'ts': 1700000000}}}}, {'id': 2, 'title': 'THL'})
+        self.assertEqual(set(self.state['escalations']), {'id:2'})
+        self._ingest()
+        self.assertEqual(self.state['escalations'], {})
+        self.assertEqual(self.module.metrics_snapshot()['alarm_acknowledged'], 2)
+
+    def test_pushed_alarm_keeps_its_escalation_while_the_poll_lags(self):
+        self.module.handle_divera_push({'id': 99, 'title': 'B3 Wohnhaus'}, self.state)
+        self.assertEqual(set(self.state['escalations']), {'id:99'})
+
+        self._ingest({'id': 1, 'title': 'THL'})
+        self.assertIn('id:99', self.state['alarm_snapshots'])
+        self.assertIn('id:99', self.state['escalations'])
+
+        self.module.ALARM_PUSH_GRACE_SECONDS = 0
+        self._ingest({'id': 1, 'title': 'THL'})
+        self.assertNotIn('id:99', self.state['escalations'])
+
+    def test_escalations_fire_while_the_poll_fails(self):
+        self._ingest({'id': 7, 'title': 'B3'})
+        self.state['escalations']['id:7']['due'] = 0
+        stored = json.loads(json.dumps(self.state))
+        polls = []
+
+        def failing_fetch(*_args, **_kwargs):
+            polls.append(1)
+            raise RuntimeError('DiVeRa down')
+
+        self.addCleanup(setattr, self.module, 'fetch_alarms', self.module.fetch_alarms)
+        self.module.fetch_alarms = failing_fetch
+        self.module.DIVERA_ACCESSKEY = 'key'
+        self.module.run_main_loop_step(stored)
+        self.module.run_main_loop_step(stored)
+
+        self.assertEqual(len(polls), 1)
+        self.assertEqual(self.module.metrics_snapshot()['divera_poll_error'], 1)
+        self.assertEqual(self.escalations, [('Eskalation 1: B3', '5', 'leitstelle')])
+
+    def test_timers_survive_a_restart(self):
+        self._ingest({'id': 5, 'title': 'B3'})
+        stored = json.loads(json.dumps(self.state))
+        due = stored['escalations']['id:5']['due']
+
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.module.ntfy_publish = lambda title, msg, priority=None, extras=None, topic='', **_kwargs: self.escalations.append(title)
+        self.module.save_state = lambda *_args, **_kwargs: None
+        self.assertEqual(self.module.ESCALATIONS.tick(stored, due + 3600), 1)
+        self.assertEqual(self.escalations, ['Eskalation 1: B3'])
+
+    def test_ack_endpoint_checks_the_signature(self):
+        self._ingest({'id': 1, 'title': 'B3'})
+        server = ThreadingHTTPServer(('127.0.0.1', 0), self.module.make_webhook_handler(self.state))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base = f'http://127.0.0.1:{server.server_address[1]}/ack?'
+
+        def post(query):
+            request = urllib.request.Request(base + urllib.parse.urlencode(query), data=b'', method='POST')
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    return response.status, json.loads(response.read())
+            except urllib.error.HTTPError as exc:
+                return exc.code, json.loads(exc.read())
+
+        self.assertEqual(post({'alarm': 'id:1', 'sig': 'forged'})[0], 401)
+        signature = self.module.ack_signature('id:1')
+        self.assertEqual(post({'alarm': 'id:1', 'sig': signature}), (200, {'status': 'acknowledged', 'alarm': 'id:1'}))
+        self.assertEqual(post({'alarm': 'id:1', 'sig': signature})[0], 404)
+        self.assertEqual(self.module.ESCALATIONS.tick(self.state, 10 ** 10), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
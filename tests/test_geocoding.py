@@ -0,0 +1,120 @@
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _NominatimHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlsplit(self.path).query)
+        server.queries.append(query['q'][0])
+        time.sleep(server.delay)
+        body = json.dumps([{'lat': '50.1109', 'lon': '8.6821'}] if 'haupt' in query['q'][0].lower() else []).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+class GeocodingTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _NominatimHandler)
+        self.server.queries = []
+        self.server.delay = 0.0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['GEOCODER_URL'] = f'http://127.0.0.1:{self.server.server_address[1]}/search'
+        os.environ['GEOCODER_CACHE_FILE'] = os.path.join(self.tmp.name, 'geocode-cache.json')
+        os.environ['GEOCODER_BUDGET_MS'] = '500'
+        for key in ('GEOCODER_URL', 'GEOCODER_CACHE_FILE', 'GEOCODER_BUDGET_MS', 'GEOCODER_TABLE'):
+            self.addCleanup(os.environ.pop, key, None)
+        self._reload()
+
+    def _reload(self):
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def test_lookup_is_cached_by_normalised_address_and_survives_restart(self):
+        self.assertEqual(self.module.GEOCODER.locate('Hauptstr. 1, Frankfurt'), (50.1109, 8.6821))
+        self.assertEqual(self.module.GEOCODER.locate('  hauptstr. 1   frankfurt '), (50.1109, 8.6821))
+        self.assertIsNone(self.module.GEOCODER.locate('Unbekannter Weg 9'))
+        self.assertIsNone(self.module.GEOCODER.locate('unbekannter weg 9'))
+        self.assertEqual(self.server.queries, ['Hauptstr. 1, Frankfurt', 'Unbekannter Weg 9'])
+        self.assertEqual(self.module.metrics_snapshot()['geocode_cache_hit'], 2)
+
+        self._reload()
+        self.assertEqual(self.module.GEOCODER.locate('HAUPTSTR. 1, FRANKFURT'), (50.1109, 8.6821))
+        self.assertEqual(len(self.server.queries), 2)
+
+    def test_offline_table_is_asked_first(self):
+        table = os.path.join(self.tmp.name, 'adressen.csv')
+        with open(table, 'w', encoding='utf-8') as handle:
+            handle.write('# Adresse;Breite;Länge\nFeuerwache, Am Ring 2;49.5;8.4\nHauptstr. 1,Frankfurt,50.0,8.0\n')
+        os.environ['GEOCODER_TABLE'] = table
+        self._reload()
+        self.assertEqual(self.module.GEOCODER.locate('Feuerwache Am Ring 2'), (49.5, 8.4))
+        self.assertEqual(self.module.GEOCODER.locate('Hauptstr. 1, Frankfurt'), (50.0, 8.0))
+        self.assertEqual(self.server.queries, [])
+
+    def test_slow_geocoder_does_not_delay_the_push(self):
+        self.server.delay = 0.3
+        self.module.GEOCODER_BUDGET_MS = 50
+        sent = []
+        self.module.publish_message = lambda _state, title, msg, priority_override=None, extras=None, **_kwargs: sent.append((title, msg, extras))
+        self.module.save_state = lambda *_args, **_kwargs: None
+
+        started = time.monotonic()
+        self.module.ingest_alarm_records({}, [self.module.AlarmRecord({'id': 5, 'title': 'B3 Wohnhaus', 'address': 'Hauptstr. 1'})])
+        self.assertLess(time.monotonic() - started, 0.25)
+        self.assertEqual(sent[0][0], 'B3 Wohnhaus')
+        self.assertEqual(self.module.metrics_snapshot()['geocode_late'], 1)
+
+        deadline = time.monotonic() + 3
+        while len(sent) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        title, message, _ = sent[1]
+        self.assertEqual(title, 'Standort: B3 Wohnhaus')
+        self.assertIn('50.110900,8.682100', message)
+        self.assertEqual(self.module.GEOCODER.locate('Hauptstr. 1'), (50.1109, 8.6821))
+
+    def test_new_alarms_of_a_batch_share_one_budget(self):
+        self.server.delay = 0.3
+        self.module.GEOCODER_BUDGET_MS = 150
+        sent = []
+        self.module.publish_message = lambda _state, title, msg, priority_override=None, extras=None, **_kwargs: sent.append(title)
+        self.module.save_state = lambda *_args, **_kwargs: None
+        records = [self.module.AlarmRecord({'id': i, 'title': f'B{i}', 'address': f'Hauptstr. {i}'}) for i in range(1, 5)]
+
+        started = time.monotonic()
+        self.module.ingest_alarm_records({}, records)
+        self.assertLess(time.monotonic() - started, 0.3)
+        self.assertEqual(sent[:4], ['B1', 'B2', 'B3', 'B4'])
+        self.assertEqual(self.module.metrics_snapshot()['geocode_late'], 4)
+
+    def test_damaged_cache_entries_are_skipped(self):
+        with open(os.environ['GEOCODER_CACHE_FILE'], 'w', encoding='utf-8') as handle:
+            json.dump({'hauptstr. 1': [50.1, 8.6, 1], 'ring 2': ['x', 8.0, 1], 'weg 3': [None, None, 'gestern']}, handle)
+        self._reload()
+        self.assertEqual(self.module.GEOCODER.locate('Hauptstr. 1'), (50.1, 8.6))
+        self.assertEqual(self.module.GEOCODER.stats()['entries'], 1)
+        self.assertEqual(self.server.queries, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import importlib
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+
+class HistoryTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        os.environ['HISTORY_DB_FILE'] = os.path.join(self.tmp.name, 'history.sqlite')
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_FALLBACK_URLS'] = ''
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['NTFY_RETRY_ATTEMPTS'] = '1'
+        os.environ['WEBHOOK_TOKEN'] = 'secret-token'
+        os.environ['WEBHOOK_REPLAY_PROTECTION'] = 'false'
+        self.addCleanup(os.environ.pop, 'HISTORY_DB_FILE', None)
+        self.addCleanup(os.environ.pop, 'WEBHOOK_TOKEN', None)
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.module.save_state = lambda *_args, **_kwargs: None
+
+    def _publish(self, title, ok=True):
+        class Resp:
+            def raise_for_status(self):
+                if not ok:
+                    raise RuntimeError('boom')
+
+        old_post = self.module.requests.post
+        try:
+            self.module.requests.post = lambda *args, **kwargs: Resp()
+            self.module.handle_webhook_alarm({'title': title, 'address': 'Hauptstr. 1'}, {'pending_notifications': []})
+        except RuntimeError:
+            pass
+        finally:
+            self.module.requests.post = old_post
+
+    def test_alarms_and_deliveries_are_recorded_and_paginated(self):
+        for index in range(5):
+            self._publish(f'B{index} Brand')
+        self._publish('TH Person', ok=False)
+        self.assertTrue(self.module.HISTORY.flush())
+
+        page = self.module.HISTORY.query({'kind': 'alarms', 'limit': '4'})
+        self.assertEqual([item['title'] for item in page['items']], ['TH Person', 'B4 Brand', 'B3 Brand', 'B2 Brand'])
+        self.assertEqual(page['items'][0]['source'], 'webhook')
+        rest = self.module.HISTORY.query({'kind': 'alarms', 'limit': '4', 'before_id': str(page['next_before_id'])})
+        self.assertEqual([item['title'] for item in rest['items']], ['B1 Brand', 'B0 Brand'])
+        self.assertIsNone(rest['next_before_id'])
+
+        failed = self.module.HISTORY.query({'kind': 'deliveries', 'outcome': 'failed'})
+        self.assertEqual([item['keyword'] for item in failed['items']], ['th'])
+        self.assertIn('boom', failed['items'][0]['error'])
+        self.assertEqual(self.module.HISTORY.query({'keyword': 'B3'})['items'][0]['title'], 'B3 Brand')
+
+        stats = self.module.HISTORY.stats({})
+        self.assertEqual(stats['alarms'], 6)
+        self.assertEqual(stats['deliveries']['sent']['count'], 5)
+        self.assertEqual(stats['deliveries']['failed']['count'], 1)
+
+    def test_deliveries_carry_the_alarm_id(self):
+        old_post = self.module.requests.post
+        self.addCleanup(setattr, self.module.requests, 'post', old_post)
+        self.module.requests.post = lambda *args, **kwargs: type('Resp', (), {'raise_for_status': lambda self: None})()
+        self.module.publish_message({}, 'B3 Brand', 'Hauptstr. 1', alarm_id='77')
+        self.module.publish_message({}, 'B3 Brand', 'Ring 2', alarm_id='78')
+        self.assertTrue(self.module.HISTORY.flush())
+        items = self.module.HISTORY.query({'kind': 'deliveries', 'alarm_id': '77'})['items']
+        self.assertEqual([(item['alarm_id'], item['outcome']) for item in items], [('77', 'sent')])
+
+    def test_existing_database_gets_the_delivery_alarm_id_column(self):
+        import sqlite3
+
+        conn = sqlite3.connect(os.environ['HISTORY_DB_FILE'])
+        conn.execute(
+            'CREATE TABLE deliveries (id INTEGER PRIMARY KEY, ts INTEGER NOT NULL, title TEXT, keyword TEXT,'
+            ' priority TEXT, target TEXT, outcome TEXT, error TEXT, latency_ms REAL)'
+        )
+        conn.close()
+        self.module.HISTORY.record_delivery('B3', '5', 'https://primary.example', 'sent', alarm_id='9')
+        self.assertTrue(self.module.HISTORY.flush())
+        self.assertEqual(self.module.HISTORY.query({'kind': 'deliveries', 'alarm_id': '9'})['items'][0]['title'], 'B3')
+
+    def test_retention_prunes_old_rows(self):
+        self.module.HISTORY.submit(('alarms', (1, '1', 'Alt', 'alt', '', '3', 'poll')))
+        self._publish('Neu')
+        self.assertTrue(self.module.HISTORY.flush())
+        self.module.HISTORY.prune()
+        self.assertTrue(self.module.HISTORY.flush())
+        self.assertEqual([item['title'] for item in self.module.HISTORY.query({})['items']], ['Neu'])
+
+    def test_queue_size_is_configurable(self):
+        os.environ['HISTORY_QUEUE_SIZE'] = '50'
+        self.addCleanup(os.environ.pop, 'HISTORY_QUEUE_SIZE', None)
+        module = importlib.reload(self.module)
+        self.assertEqual(module.HISTORY.queue_size, 50)
+        module.HISTORY_QUEUE_SIZE = 0
+        with self.assertRaises(SystemExit):
+            module.validate_runtime_config()
+
+    def test_history_requires_a_token(self):
+        self.module.WEBHOOK_TOKEN = ''
+        with self.assertRaises(SystemExit):
+            self.module.validate_runtime_config()
+
+    def test_invalid_query_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.module.HISTORY.query({'kind': 'users'})
+        with self.assertRaises(ValueError):
+            self.module.HISTORY.query({'limit': '10000'})
+
+    def test_history_endpoint_requires_token(self):
+        self._publish('B2 Brand')
+        self.assertTrue(self.module.HISTORY.flush())
+        server = ThreadingHTTPServer(('127.0.0.1', 0), self.module.make_webhook_handler({}))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_address[1]}/admin/history"
+
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(base, timeout=5)
+        self.assertEqual(ctx.exception.code, 401)
+
+        with urllib.request.urlopen(f"{base}?token=secret-token&kind=deliveries", timeout=5) as resp:
+            body = json.loads(resp.read())
+        self.assertEqual(body['items'][0]['outcome'], 'sent')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import importlib
+import json
+import os
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+
+class HttpRoutingTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['WEBHOOK_TOKEN'] = 'secret-token'
+        os.environ['WEBHOOK_REPLAY_PROTECTION'] = 'false'
+        os.environ['CLUSTER_SHARED_TOKEN'] = ''
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def tearDown(self):
+        os.environ.pop('WEBHOOK_TOKEN', None)
+
+    def _serve(self, handler):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def _request(self, url, method='GET', data=None):
+        req = urllib.request.Request(url, data=data, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=5) as resp:
+                return resp.status, resp.headers, resp.read()
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.headers, exc.read()
+
+    def _route_stats(self, server, label, count):
+        # Stats are recorded after the response is written; give the server thread a moment.
+        deadline = time.monotonic() + 2
+        while True:
+            stats = self.module.ROUTE_TABLES[server].stats_snapshot()
+            if stats.get(label, {}).get('count') == count or time.monotonic() > deadline:
+                return stats.get(label, {})
+            time.sleep(0.01)
+
+    def test_route_table_tolerates_trailing_slash_and_reports_methods(self):
+        routes = self.module.RouteTable('test')
+        routes.add('GET', '/admin/config', 'get')
+        routes.add('POST', '/admin/config/', 'post')
+
+        route, allowed = routes.resolve('GET', '/admin/config/')
+        self.assertEqual(route.handler, 'get')
+        self.assertEqual(allowed, ['GET', 'POST'])
+
+        route, allowed = routes.resolve('DELETE', '/admin/config')
+        self.assertIsNone(route)
+        self.assertEqual(allowed, ['GET', 'POST'])
+
+        self.assertEqual(routes.resolve('GET', '/admin/configuration'), (None, []))
+
+    def test_route_table_first_registration_wins(self):
+        routes = self.module.RouteTable('test')
+        routes.add('GET', '/', 'ui')
+        routes.add('GET', '/', 'other')
+        self.assertEqual(routes.resolve('GET', '/')[0].handler, 'ui')
+
+    def test_webhook_server_applies_auth_policy_and_counts_requests(self):
+        base = self._serve(self.module.make_webhook_handler({}))
+
+        status, _, _ = self._request(f"{base}/admin/config")
+        self.assertEqual(status, 401)
+
+        status, _, body = self._request(f"{base}/admin/config/?token=secret-token")
+        self.assertEqual(status, 200)
+        self.assertIn(b'cfg-search', body)
+
+        status, headers, _ = self._request(f"{base}/webhook/alarm")
+        self.assertEqual(status, 405)
+        self.assertEqual(headers.get('Allow'), 'POST')
+
+        status, _, body = self._request(f"{base}/does-not-exist")
+        self.assertEqual(status, 404)
+        self.assertEqual(json.loads(body), {'error': 'not found'})
+
+        self.assertEqual(self._route_stats('webhook', 'GET /admin/config', 2).get('count'), 2)
+        self.assertEqual(self._route_stats('webhook', 'method_not_allowed', 1).get('count'), 1)
+        self.assertEqual(self._route_stats('webhook', 'not_found', 1).get('count'), 1)
+
+    def test_unauthorized_trigger_counts_as_webhook_error(self):
+        base = self._serve(self.module.make_webhook_handler({}))
+        status, _, _ = self._request(f"{base}/webhook/trigger?title=Test")
+        self.assertEqual(status, 401)
+        metrics = self.module.metrics_snapshot()
+        self.assertEqual(metrics['webhook_requests'], 1)
+        self.assertEqual(metrics['webhook_error'], 1)
+
+    def test_ui_page_supports_etag_revalidation(self):
+        base = self._serve(self.module.make_webhook_handler({}))
+        status, headers, body = self._request(f"{base}/")
+        self.assertEqual(status, 200)
+        etag = headers.get('ETag')
+        self.assertTrue(etag)
+        self.assertEqual(body.decode('utf-8'), self.module.render_web_form_page())
+
+        req = urllib.request.Request(f"{base}/", headers={'If-None-Match': etag})
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(req, timeout=5)
+        self.assertEqual(ctx.exception.code, 304)
+
+    def test_config_page_uses_cached_update_status_without_subprocess(self):
+        old_cmd = self.module.UPDATE_CHECK_COMMAND
+        old_run = self.module.subprocess.run
+        calls = []
+        try:
+            self.module.UPDATE_CHECK_COMMAND = 'dummy-check'
+            self.module.subprocess.run = lambda *args, **kwargs: calls.append(args)
+            html = self.module.render_config_page()
+        finally:
+            self.module.UPDATE_CHECK_COMMAND = old_cmd
+            self.module.subprocess.run = old_run
+
+        self.assertEqual(calls, [])
+        self.assertIn('Update-Check noch nicht ausgeführt', html)
+
+    def test_health_metrics_include_route_latency(self):
+        base = self._serve(self.module.make_health_handler())
+        status, _, _ = self._request(f"{base}/healthz")
+        self.assertEqual(status, 200)
+        self._route_stats('health', 'GET /healthz', 1)
+
+        status, _, body = self._request(f"{base}/metrics")
+        self.assertEqual(status, 200)
+        text = body.decode('utf-8')
+        self.assertIn('alarm_gateway_http_requests_total{server="health",route="GET /healthz"} 1', text)
+        self.assertIn('alarm_gateway_http_request_seconds_sum{server="health",route="GET /healthz"}', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
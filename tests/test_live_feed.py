@@ -0,0 +1,112 @@
+import http.client
+import importlib
+import json
+import os
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+
+class LiveFeedTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['WEBHOOK_TOKEN'] = 'secret-token'
+        os.environ['WEBHOOK_REPLAY_PROTECTION'] = 'false'
+        os.environ['LIVE_FEED_ENABLED'] = 'true'
+        os.environ['LIVE_FEED_MAX_CLIENTS'] = '2'
+        os.environ['LIVE_FEED_BUFFER'] = '3'
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def tearDown(self):
+        for key in ('WEBHOOK_TOKEN', 'LIVE_FEED_ENABLED', 'LIVE_FEED_MAX_CLIENTS', 'LIVE_FEED_BUFFER'):
+            os.environ.pop(key, None)
+
+    def _serve(self, state):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), self.module.make_webhook_handler(state))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server.server_address[1]
+
+    def _get_json(self, port, path):
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5) as resp:
+                return resp.status, json.loads(resp.read())
+        except urllib.error.HTTPError as exc:
+            return exc.code, json.loads(exc.read())
+
+    def test_slow_reader_skips_ahead_and_reports_lost_events(self):
+        feed = self.module.LIVE_FEED
+        for index in range(5):
+            feed.publish('alarm', {'title': f'A{index}'})
+
+        events, cursor, lost = feed.wait(0, timeout=0)
+        self.assertEqual([event['title'] for _, event, _ in events], ['A2', 'A3', 'A4'])
+        self.assertEqual((cursor, lost), (5, 2))
+        self.assertEqual(feed.wait(cursor, timeout=0), ([], 5, 0))
+
+    def test_long_poll_returns_current_alarms_then_waits_for_events(self):
+        state = {'alarm_snapshots': {'id:7': {'title': 'B3 Brand', 'address': 'Hauptstr. 1', 'text': '', 'closed': ''}}}
+        port = self._serve(state)
+
+        status, payload = self._get_json(port, '/feed?token=secret-token&timeout=0')
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['events'], [])
+        self.assertEqual(payload['current'][0]['alarm_id'], '7')
+
+        timer = threading.Timer(0.2, self.module.publish_feed_event, args=('alarm', {'title': 'THL 1'}))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        status, payload = self._get_json(port, f"/feed?token=secret-token&since={payload['next']}&timeout=5")
+        self.assertEqual(status, 200)
+        self.assertEqual([event['title'] for event in payload['events']], ['THL 1'])
+        self.assertEqual(payload['next'], 1)
+        self.assertNotIn('current', payload)
+
+    def test_sse_stream_delivers_pushed_alarm_and_caps_clients(self):
+        self.module.LIVE_FEED_MAX_CLIENTS = 1
+        port = self._serve({})
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        self.addCleanup(conn.close)
+        conn.request('GET', '/feed?token=secret-token', headers={'Accept': 'text/event-stream'})
+        resp = conn.getresponse()
+        self.assertEqual(resp.status, 200)
+        self.assertTrue(resp.getheader('Content-Type').startswith('text/event-stream'))
+        self.assertEqual(resp.readline(), b'event: current\n')
+
+        status, payload = self._get_json(port, '/feed?token=secret-token&timeout=0')
+        self.assertEqual(status, 503)
+
+        self.module.publish_feed_event('alarm', {'title': 'B3 Brand'})
+        deadline = time.monotonic() + 5
+        lines = []
+        while time.monotonic() < deadline:
+            line = resp.readline()
+            lines.append(line)
+            if line.startswith(b'data: {"id"'):
+                break
+        self.assertIn(b'id: 1\n', lines)
+        self.assertIn(b'event: alarm\n', lines)
+        self.assertEqual(json.loads(lines[-1][len(b'data: '):])['title'], 'B3 Brand')
+
+    def test_feed_requires_token(self):
+        port = self._serve({})
+        status, _ = self._get_json(port, '/feed?timeout=0')
+        self.assertEqual(status, 401)
+
+
+    def test_feed_requires_a_token(self):
+        self.module.WEBHOOK_TOKEN = ''
+        with self.assertRaises(SystemExit):
+            self.module.validate_runtime_config()
+        self.module.LIVE_FEED_ENABLED = False
+        self.module.validate_runtime_config()
+
+if __name__ == '__main__':
+    unittest.main()
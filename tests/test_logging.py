@@ -0,0 +1,64 @@
+import importlib
+import io
+import json
+import logging
+import os
+import unittest
+
+
+class LoggingTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['LOG_FORMAT'] = 'json'
+        os.environ['LOG_REPEAT_INTERVAL_SECONDS'] = '60'
+        self.addCleanup(os.environ.pop, 'LOG_FORMAT', None)
+        self.addCleanup(os.environ.pop, 'LOG_REPEAT_INTERVAL_SECONDS', None)
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.handler = next(h for h in logging.getLogger().handlers if getattr(h, 'alarm_gateway', False))
+        self.stream = io.StringIO()
+        self.addCleanup(self.handler.setStream, self.handler.setStream(self.stream))
+        self.addCleanup(self.module.configure_logging)
+
+    def _lines(self):
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_json_lines_carry_correlation_ids(self):
+        with self.module.log_context(request='abc123'):
+            with self.module.log_context(alarm='id:7'):
+                self.module.LOGGER.warning('Alarm %s verschickt', 'B3')
+            self.module.LOGGER.warning('Antwort gesendet')
+        first, second = self._lines()
+        self.assertEqual((first['message'], first['request'], first['alarm']), ('Alarm B3 verschickt', 'abc123', 'id:7'))
+        self.assertEqual(first['level'], 'WARNING')
+        self.assertNotIn('alarm', second)
+
+    def test_repeated_errors_are_collapsed(self):
+        filters = [f for f in self.handler.filters if isinstance(f, self.module.RepeatedLogFilter)]
+        for _ in range(50):
+            self.module.LOGGER.error('DiVeRa nicht erreichbar: %s', 'timeout')
+        self.module.LOGGER.error('anderer Fehler')
+        self.assertEqual([line['message'] for line in self._lines()], ['DiVeRa nicht erreichbar: timeout', 'anderer Fehler'])
+        self.assertEqual(self.module.log_suppressed_count(), 49)
+
+        filters[0].interval = 0.000001
+        self.module.LOGGER.error('DiVeRa nicht erreichbar: %s', 'timeout')
+        self.assertEqual(self._lines()[-1]['repeated'], 49)
+
+    def test_disabled_debug_does_not_format_arguments(self):
+        class Exploding:
+            def __str__(self):
+                raise AssertionError('formatted although debug is off')
+
+        self.module.DEBUG_DIVERA = True
+        logging.getLogger().setLevel(logging.INFO)
+        self.module.debug_log('Wert: %s', Exploding())
+        self.assertEqual(self.stream.getvalue(), '')
+
+    def test_invalid_format_stops_startup(self):
+        self.module.LOG_FORMAT = 'xml'
+        with self.assertRaises(SystemExit):
+            self.module.validate_runtime_config()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import importlib
+import json
+import os
+import tempfile
+import unittest
+
+
+class MessageTemplateTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for key in ('MESSAGE_TITLE_TEMPLATE', 'MESSAGE_BODY_TEMPLATE', 'MESSAGE_TEMPLATE_FILE', 'MESSAGE_MAX_BYTES', 'NTFY_PRIORITY_KEYWORDS'):
+            self.addCleanup(os.environ.pop, key, None)
+        self._reload()
+
+    def _reload(self):
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.addCleanup(self.module.SINKS.replace, [])
+
+    def _template_file(self, data):
+        path = os.path.join(self.tmp.name, 'templates.json')
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(data, handle)
+        return path
+
+    def test_default_templates_keep_the_classic_layout(self):
+        alarm = {'id': 7, 'title': 'B3 Wohnhaus', 'text': 'Rauch', 'address': 'Hauptstr. 1', 'url': 'https://divera.example/7'}
+        self.assertEqual(self.module.format_alarm(alarm), (
+            'B3 Wohnhaus', 'Alarmnummer: 7\nText: Rauch\nAdresse: Hauptstr. 1\nhttps://divera.example/7'))
+        self.assertEqual(self.module.format_alarm({'title': 'THL', 'address': 'Ring 2'}), ('THL', 'Adresse: Ring 2'))
+        self.assertEqual(self.module.format_alarm({}), ('DiVeRa Alarm', 'Neue Alarmierung eingegangen.'))
+
+    def test_sections_fallbacks_and_length_limits(self):
+        render, used = self.module.compile_message_template('{keyword}: [[{address}, ]]{text:10|kein Text}\\\\n{priority}')
+        self.assertEqual(used, {'keyword', 'address', 'text', 'priority'})
+        self.assertEqual(render({'keyword': 'B3', 'address': 'Ring 2', 'text': 'Brand im Keller', 'priority': '5'}),
+                         'B3: Ring 2, Brand im…\n5')
+        self.assertEqual(render({'keyword': 'B3'}), 'B3: kein Text\n')
+        for bad in ('{unknown}', '{title', '[[{title}'):
+            with self.assertRaises(ValueError):
+                self.module.compile_message_template(bad)
+
+    def test_body_is_cut_to_the_byte_limit(self):
+        os.environ['MESSAGE_MAX_BYTES'] = '64'
+        os.environ['MESSAGE_BODY_TEMPLATE'] = '{text}'
+        self._reload()
+        _, body = self.module.format_alarm({'title': 'B3', 'text': 'ä' * 100})
+        self.assertLessEqual(len(body.encode('utf-8')), 64)
+        self.assertTrue(body.endswith('…'))
+
+    def test_invalid_template_stops_startup(self):
+        os.environ['MESSAGE_TITLE_TEMPLATE'] = '{stichwort}'
+        self._reload()
+        with self.assertRaises(SystemExit):
+            self.module.validate_runtime_config()
+
+    def test_routes_render_each_template_once_per_alarm(self):
+        os.environ['MESSAGE_TEMPLATE_FILE'] = self._template_file({
+            'kurz': {'title': '{keyword}', 'body': '{address|ohne Adresse}', 'targets': ['mqtt', 'webhook2']},
+            'english': {'title': 'Alarm: {title}', 'body': '[[{text}]]', 'empty': 'New alarm', 'targets': ['ntfy']},
+        })
+        self._reload()
+        module = self.module
+        received = []
+
+        class Recorder(module.OutputSink):
+            def send(self, event):
+                received.append((self.name, event['title'], event['message']))
+
+        module.SINKS.replace([Recorder('mqtt', ''), Recorder('webhook', ''), Recorder('webhook2', '')])
+        record = module.AlarmRecord({'id': 1, 'title': 'B3 Wohnhaus', 'address': 'Hauptstr. 1'})
+        fields = record.template_fields()
+        title, msg = module.format_alarm_fields(fields)
+        self.assertEqual((title, msg), ('Alarm: B3 Wohnhaus', 'New alarm'))
+
+        module.announce_alarm({'alarm_id': '1', 'title': title, 'message': msg}, fields)
+        self.assertTrue(module.SINKS.flush())
+        self.assertEqual(sorted(received), [
+            ('mqtt', 'B3', 'Hauptstr. 1'),
+            ('webhook', 'B3 Wohnhaus', 'Alarmnummer: 1\nAdresse: Hauptstr. 1'),
+            ('webhook2', 'B3', 'Hauptstr. 1'),
+        ])
+        stats = module.MESSAGE_TEMPLATES.stats()
+        self.assertEqual((stats['misses'], stats['hits']), (3, 0))
+
+        module.format_alarm_fields(fields)
+        self.assertEqual(module.MESSAGE_TEMPLATES.stats()['hits'], 1)
+
+    def test_priority_comes_from_the_alarm_title_not_the_rendered_one(self):
+        os.environ['MESSAGE_TITLE_TEMPLATE'] = 'Einsatz {alarm_id}'
+        os.environ['MESSAGE_BODY_TEMPLATE'] = '{title} ({priority})'
+        os.environ['NTFY_PRIORITY_KEYWORDS'] = 'brand=2'
+        self._reload()
+        sent = []
+        self.module.publish_message = lambda _state, title, msg, priority_override=None, **_kwargs: sent.append(
+            (title, msg, priority_override))
+        self.module.save_state = lambda *_args, **_kwargs: None
+
+        self.module.ingest_alarm_records({}, [self.module.AlarmRecord({'id': 8, 'title': 'Brand Wohnhaus'})])
+        self.module.handle_webhook_alarm({'title': 'Brand Scheune'}, {})
+        self.assertEqual(sent, [
+            ('Einsatz 8', 'Brand Wohnhaus (2)', '2'),
+            ('Einsatz', 'Brand Scheune (2)', '2'),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
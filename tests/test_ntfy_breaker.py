@@ -0,0 +1,111 @@
+import importlib
+import os
+import unittest
+
+
+class Resp:
+    def __init__(self, ok, payload=None):
+        self.ok = ok
+        self.payload = payload or {}
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError('fail')
+
+    def json(self):
+        return self.payload
+
+
+class NtfyBreakerTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_FALLBACK_URLS'] = 'https://backup.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['NTFY_RETRY_ATTEMPTS'] = '1'
+        os.environ['NTFY_BREAKER_FAILURE_THRESHOLD'] = '2'
+        self.addCleanup(os.environ.pop, 'NTFY_BREAKER_FAILURE_THRESHOLD', None)
+        self.addCleanup(os.environ.__setitem__, 'NTFY_FALLBACK_URLS', '')
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.calls = []
+        self.primary_up = False
+        old_post, old_get = self.module.requests.post, self.module.requests.get
+        self.module.requests.post = self._post
+        self.module.requests.get = lambda url, **kwargs: Resp(self.primary_up, {'healthy': self.primary_up})
+        self.addCleanup(setattr, self.module.requests, 'post', old_post)
+        self.addCleanup(setattr, self.module.requests, 'get', old_get)
+
+    def _post(self, url, **kwargs):
+        self.calls.append(url.split('/')[2])
+        return Resp(self.primary_up or not url.startswith('https://primary.example'))
+
+    def _states(self):
+        return {t['target']: t['state'] for t in self.module.NTFY_TARGET_HEALTH.snapshot()}
+
+    def test_open_primary_is_skipped_until_probe_succeeds(self):
+        self.module.ntfy_publish('A', 'x', '5')
+        self.assertEqual(self.calls, ['primary.example', 'backup.example'])
+        self.module.NTFY_TARGET_HEALTH.record_failure('https://primary.example')
+        self.assertEqual(self._states()['https://primary.example'], 'open')
+
+        self.calls.clear()
+        self.module.ntfy_publish('B', 'x', '5')
+        self.assertEqual(self.calls, ['backup.example'])
+
+        self.module.probe_ntfy_targets()
+        self.assertEqual(self._states()['https://primary.example'], 'open')
+
+        self.primary_up = True
+        self.module.probe_ntfy_targets()
+        self.assertEqual(self._states()['https://primary.example'], 'half_open')
+
+    def test_half_open_failure_reopens_and_success_closes(self):
+        health = self.module.NTFY_TARGET_HEALTH
+        for _ in range(2):
+            health.record_failure('https://primary.example')
+        health.mark_half_open('https://primary.example')
+        health.record_failure('https://primary.example')
+        self.assertEqual(self._states()['https://primary.example'], 'open')
+
+        health.mark_half_open('https://primary.example')
+        health.record_success('https://primary.example', 0.05)
+        self.assertEqual(self._states()['https://primary.example'], 'closed')
+
+    def test_failed_primary_drops_behind_healthy_fallback(self):
+        self.module.ntfy_publish('A', 'x', '5')
+        self.calls.clear()
+        self.module.ntfy_publish('B', 'x', '5')
+        self.assertEqual(self.calls, ['backup.example'])
+        self.assertEqual(self._states()['https://primary.example'], 'closed')
+
+        self.primary_up = True
+        for _ in range(3):
+            self.module.probe_ntfy_targets()
+        self.calls.clear()
+        self.module.ntfy_publish('C', 'x', '5')
+        self.assertEqual(self.calls, ['primary.example'])
+
+    def test_targets_are_ordered_by_health_score(self):
+        health = self.module.NTFY_TARGET_HEALTH
+        targets = ['https://primary.example', 'https://backup.example']
+        self.assertEqual(health.ordered(targets), targets)
+        health.record_success('https://primary.example', 2.0)
+        health.record_success('https://backup.example', 0.01)
+        self.assertEqual(health.ordered(targets), ['https://backup.example', 'https://primary.example'])
+
+    def test_all_open_targets_are_still_tried(self):
+        health = self.module.NTFY_TARGET_HEALTH
+        for target in ('https://primary.example', 'https://backup.example'):
+            for _ in range(2):
+                health.record_failure(target)
+        self.assertEqual(len(health.ordered(list(self.module.NTFY_TARGETS))), 2)
+
+    def test_breaker_state_is_exported(self):
+        for _ in range(2):
+            self.module.NTFY_TARGET_HEALTH.record_failure('https://primary.example')
+        text = self.module.render_metrics_text()
+        self.assertIn('alarm_gateway_ntfy_target_state{target="https://primary.example"} 2', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import importlib
+import json
+import os
+import unittest
+
+
+class _Resp:
+    def __init__(self, ok):
+        self.ok = ok
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError('fail')
+
+
+class NtfyJsonPublishTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_FALLBACK_URLS'] = 'https://fallback.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['NTFY_RETRY_ATTEMPTS'] = '2'
+        os.environ['NTFY_RETRY_DELAY_SECONDS'] = '0'
+        os.environ['NTFY_RETRY_JITTER_SECONDS'] = '0'
+        os.environ['NTFY_PUBLISH_MODE'] = 'json'
+        os.environ['NTFY_KEYWORD_TAGS'] = 'b3=fire,wohnhaus=house'
+        os.environ['NTFY_ATTACH_URL'] = 'https://maps.example/static.png?center={query}&id={alarm_id}'
+        for key in ('NTFY_FALLBACK_URLS', 'NTFY_RETRY_ATTEMPTS', 'NTFY_RETRY_DELAY_SECONDS', 'NTFY_RETRY_JITTER_SECONDS',
+                    'NTFY_PUBLISH_MODE', 'NTFY_KEYWORD_TAGS', 'NTFY_ATTACH_URL'):
+            self.addCleanup(os.environ.pop, key, None)
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.calls = []
+        self.addCleanup(setattr, self.module.requests, 'post', self.module.requests.post)
+
+    def _fake_post(self, fail_urls=()):
+        def fake_post(url, **kwargs):
+            self.calls.append((url, kwargs))
+            return _Resp(url not in fail_urls)
+        self.module.requests.post = fake_post
+
+    def test_extras_prefer_coordinates_and_derive_tags(self):
+        record = self.module.AlarmRecord({'id': 7, 'title': 'B3 Wohnhaus', 'address': 'Hauptstr. 1, Musterstadt',
+                                          'lat': '50.1', 'lng': '8.25', 'url': 'https://divera.example/alarm/7'})
+        extras = self.module.build_ntfy_extras(record.title, record.address, record.coordinates, record.alarm_id, record.url)
+        self.assertEqual(extras['tags'], ['fire', 'house', 'B3'])
+        self.assertEqual(extras['click'], 'https://www.openstreetmap.org/search?query=50.100000%2C8.250000')
+        self.assertEqual([a['label'] for a in extras['actions']], ['Karte', 'Alarm öffnen'])
+        self.assertEqual(extras['attach'], 'https://maps.example/static.png?center=50.100000%2C8.250000&id=7')
+
+        by_address = self.module.build_ntfy_extras('THL 1', 'Hauptstr. 1', self.module.AlarmRecord({'lat': 0, 'lng': 0}).coordinates)
+        self.assertEqual(by_address['click'], 'https://www.openstreetmap.org/search?query=Hauptstr.%201')
+
+    def test_json_body_is_serialised_once_for_all_targets_and_retries(self):
+        self._fake_post(fail_urls=('https://primary.example', 'https://fallback.example'))
+        extras = {'tags': ['fire'], 'click': 'https://map.example'}
+        with self.assertRaises(RuntimeError):
+            self.module.ntfy_publish('B3 Wohnhaus', 'Hauptstr. 1', '5', extras=extras)
+
+        self.assertEqual([url for url, _ in self.calls], ['https://primary.example', 'https://fallback.example'] * 2)
+        bodies = [kwargs['data'] for _, kwargs in self.calls]
+        self.assertTrue(all(body is bodies[0] for body in bodies))
+        document = json.loads(bodies[0])
+        self.assertEqual(document, {'topic': 'topic', 'title': 'B3 Wohnhaus', 'message': 'Hauptstr. 1', 'priority': 5,
+                                    'tags': ['fire'], 'click': 'https://map.example'})
+        self.assertEqual(self.calls[0][1]['headers']['Content-Type'], 'application/json')
+
+    def test_queued_push_keeps_its_extras(self):
+        state = {'pending_notifications': []}
+        self.module.save_state = lambda *_args, **_kwargs: None
+        self._fake_post(fail_urls=('https://primary.example', 'https://fallback.example'))
+        with self.assertRaises(RuntimeError):
+            self.module.publish_message(state, 'B3', 'x', extras={'click': 'https://map.example'})
+        self.assertEqual(state['pending_notifications'][0]['extras'], {'click': 'https://map.example'})
+
+        self.calls.clear()
+        self._fake_post()
+        self.module.flush_pending_notifications(state)
+        self.assertEqual(state['pending_notifications'], [])
+        self.assertEqual(json.loads(self.calls[0][1]['data'])['click'], 'https://map.example')
+
+    def test_text_mode_is_unchanged(self):
+        self.module.NTFY_PUBLISH_MODE = 'text'
+        self.assertEqual(self.module.build_ntfy_extras('B3', 'Hauptstr. 1'), {})
+        self._fake_post()
+        self.module.ntfy_publish('B3', 'Hauptstr. 1', '4')
+        url, kwargs = self.calls[0]
+        self.assertEqual(url, 'https://primary.example/topic')
+        self.assertEqual(kwargs['data'], 'Hauptstr. 1'.encode('utf-8'))
+        self.assertEqual(kwargs['headers'], {'Title': 'B3', 'Priority': '4'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import importlib
+import os
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+
+class ProfilerTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['WEBHOOK_TOKEN'] = 'secret-token'
+        os.environ['PROFILE_ENABLED'] = 'true'
+        for key in ('WEBHOOK_TOKEN', 'PROFILE_ENABLED'):
+            self.addCleanup(os.environ.pop, key, None)
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def _busy_thread(self):
+        stop = threading.Event()
+        module = self.module
+
+        def spin():
+            while not stop.is_set():
+                module.get_alarms_list({'data': {'items': {str(i): {'id': i} for i in range(50)}}})
+
+        thread = threading.Thread(target=spin, name='busy worker', daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(stop.set)
+
+    def test_profile_endpoint_returns_collapsed_stacks(self):
+        self._busy_thread()
+        server = ThreadingHTTPServer(('127.0.0.1', 0), self.module.make_health_handler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f'http://127.0.0.1:{server.server_address[1]}/debug/profile?seconds=0.3&hz=200'
+
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(url, timeout=5)
+        self.assertEqual(ctx.exception.code, 401)
+
+        request = urllib.request.Request(url, headers={'Authorization': 'Bearer secret-token'})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            self.assertGreater(int(response.headers['X-Profile-Samples']), 10)
+            lines = response.read().decode('utf-8').splitlines()
+        busy = [line for line in lines if line.startswith('busy_worker;') and 'alarm_gateway.py:get_alarms_list' in line]
+        self.assertTrue(busy)
+        stack, count = busy[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+        self.assertNotIn('get_profile', ''.join(lines))
+
+    def test_continuous_sampling_counts_hot_functions_cheaply(self):
+        self._busy_thread()
+        sampler = self.module.StackSampler()
+        for _ in range(20):
+            sampler.sample()
+            time.sleep(0.01)
+        self.assertEqual(sampler.samples, 20)
+        self.assertGreater(sampler.hot['get_alarms_list'], 0)
+        self.assertEqual(sampler.hot['ntfy_publish'], 0)
+        self.assertLess(sampler.busy_seconds / 20, 0.005)
+
+        self.module.PROFILE_CONTINUOUS_HZ = 5
+        self.module.CONTINUOUS_PROFILE = sampler
+        text = self.module.render_metrics_text()
+        self.assertIn('alarm_gateway_profile_samples_total{function="get_alarms_list"}', text)
+        self.assertIn('alarm_gateway_profile_overhead_ratio', text)
+
+    def test_profiler_requires_a_token(self):
+        self.module.WEBHOOK_TOKEN = ''
+        with self.assertRaises(SystemExit):
+            self.module.validate_runtime_config()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import importlib
+import os
+import tempfile
+import unittest
+
+
+class OkResponse:
+    def raise_for_status(self):
+        return None
+
+
+class PushLimitTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_FALLBACK_URLS'] = ''
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['NTFY_RETRY_ATTEMPTS'] = '1'
+        os.environ['NTFY_DEFAULT_PRIORITY'] = '3'
+        os.environ['NTFY_RATE_LIMIT_PER_MINUTE'] = '6'
+        os.environ['NTFY_RATE_LIMIT_BURST'] = '2'
+        os.environ['NTFY_COALESCE_WINDOW_SECONDS'] = '5'
+        self.addCleanup(self._restore_env)
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.posts = []
+        old_post = self.module.requests.post
+        self.module.requests.post = lambda url, **kwargs: self.posts.append(kwargs['headers']['Title']) or OkResponse()
+        self.addCleanup(setattr, self.module.requests, 'post', old_post)
+
+    def _restore_env(self):
+        for name in ('NTFY_DEFAULT_PRIORITY', 'NTFY_RATE_LIMIT_PER_MINUTE', 'NTFY_RATE_LIMIT_BURST', 'NTFY_COALESCE_WINDOW_SECONDS'):
+            os.environ.pop(name, None)
+
+    def test_token_bucket_refills_over_time(self):
+        bucket = self.module.TokenBucket(1.0, 2)
+        now = bucket.updated
+        self.assertTrue(bucket.try_acquire(now))
+        self.assertTrue(bucket.try_acquire(now))
+        self.assertFalse(bucket.try_acquire(now + 0.5))
+        self.assertTrue(bucket.try_acquire(now + 1.0))
+
+    def test_rate_limit_applies_below_bypass_priority_only(self):
+        self.module.ntfy_publish('A', 'x')
+        self.module.ntfy_publish('B', 'x')
+        with self.assertRaises(self.module.PushRateLimited):
+            self.module.ntfy_publish('C', 'x')
+        self.module.ntfy_publish('MANV', 'x', priority_override='5')
+        self.assertEqual(self.posts, ['A', 'B', 'MANV'])
+        self.assertEqual(self.module.metrics_snapshot()['push_rate_limited'], 1)
+
+    def test_low_priority_pushes_are_coalesced_into_summary(self):
+        state = {'pending_notifications': []}
+        self.module.save_state = lambda *_args, **_kwargs: None
+        self.module.publish_or_coalesce(state, 'Probealarm 1', 'Text 1')
+        self.module.publish_or_coalesce(state, 'Probealarm 2', 'Text 2')
+        self.module.flush_coalesced_pushes(state)
+        self.assertEqual(self.posts, [])
+
+        self.module.flush_coalesced_pushes(state, force=True)
+        self.assertEqual(self.posts, ['2 neue Alarme'])
+        metrics = self.module.metrics_snapshot()
+        self.assertEqual(metrics['push_coalesced'], 2)
+        self.assertEqual(metrics['push_coalesced_summaries'], 1)
+
+    def test_held_back_pushes_survive_a_restart(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.module.STATE_FILE = os.path.join(tmp.name, 'state.json')
+        state = self.module.load_state(self.module.STATE_FILE)
+        self.module.publish_or_coalesce(state, 'Probealarm 1', 'Text 1')
+        self.module.publish_or_coalesce(state, 'MANV', 'Text', priority='5')
+        self.assertEqual(self.posts, ['MANV'])
+
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.module.requests.post = lambda url, **kwargs: self.posts.append(kwargs['headers']['Title']) or OkResponse()
+        self.module.STATE_FILE = os.path.join(tmp.name, 'state.json')
+        restored = self.module.load_state(self.module.STATE_FILE)
+        self.module.flush_pending_notifications(restored)
+        self.assertEqual(self.posts, ['MANV'])
+        self.module.flush_coalesced_pushes(restored, force=True)
+        self.assertEqual(self.posts, ['MANV', 'Probealarm 1'])
+        self.assertEqual(self.module.load_state(self.module.STATE_FILE)['pending_notifications'], [])
+
+    def test_rate_limited_webhook_alarm_is_reported_as_queued(self):
+        state = {'pending_notifications': []}
+        self.module.save_state = lambda *_args, **_kwargs: None
+        self.module.ntfy_publish('A', 'x')
+        self.module.ntfy_publish('B', 'x')
+        result = self.module.handle_webhook_alarm({'title': 'Probealarm', 'priority': '3'}, state)
+        self.assertEqual(result['status'], 'queued')
+        self.assertEqual([item['title'] for item in state['pending_notifications']], ['Probealarm'])
+
+    def test_summary_is_truncated(self):
+        items = [(f'Alarm {i}', 'x' * 500, '3') for i in range(20)]
+        title, message, priority = self.module.build_push_summary(items)
+        self.assertEqual(title, '20 neue Alarme')
+        self.assertLess(len(message), 4096)
+        self.assertTrue(message.endswith('weitere'))
+        self.assertEqual(priority, '3')
+
+    def test_flush_keeps_going_past_failures_and_backs_off(self):
+        state = {'pending_notifications': [{'title': 'A'}, {'title': 'B'}, {'title': 'MANV', 'priority': '5'}, {'title': 'C'}]}
+        self.module.save_state = lambda *_args, **_kwargs: None
+        self.module.NTFY_RATE_LIMIT_BURST = 1
+        self.module.PUSH_RATE_LIMITER.reset()
+
+        self.module.flush_pending_notifications(state)
+        self.assertEqual(self.posts, ['A', 'MANV'])
+        self.assertEqual([item['title'] for item in state['pending_notifications']], ['B', 'C'])
+        self.assertGreater(self.module.FLUSH_BACKOFF['next'], 0)
+
+        # During the backoff only bypass-priority items are retried.
+        self.module.enqueue_notification(state, 'THL', 'x', '5', 'down')
+        self.module.flush_pending_notifications(state)
+        self.assertEqual(self.posts, ['A', 'MANV', 'THL'])
+        self.assertEqual([item['title'] for item in state['pending_notifications']], ['B', 'C'])
+
+    def test_flush_keeps_items_enqueued_while_it_runs(self):
+        state = {'pending_notifications': [{'title': 'A'}]}
+        self.module.save_state = lambda *_args, **_kwargs: None
+        module = self.module
+
+        def post(url, **kwargs):
+            module.enqueue_notification(state, 'Neu', 'x', '', 'queued meanwhile')
+            return OkResponse()
+
+        module.requests.post = post
+        module.flush_pending_notifications(state)
+        self.assertEqual([item['title'] for item in state['pending_notifications']], ['Neu'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import importlib
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+BERLIN = ZoneInfo('Europe/Berlin')
+
+
+def berlin(*args, fold=0):
+    return datetime(*args, tzinfo=BERLIN, fold=fold).timestamp()
+
+
+class ScheduleTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['NTFY_PRIORITY_KEYWORDS'] = 'türöffnung=4,b3=5'
+        os.environ['NTFY_DEFAULT_PRIORITY'] = '3'
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        os.environ['SCHEDULE_FILE'] = os.path.join(self.tmp.name, 'zeitplan.json')
+        for key in ('NTFY_PRIORITY_KEYWORDS', 'NTFY_DEFAULT_PRIORITY', 'SCHEDULE_FILE'):
+            self.addCleanup(os.environ.pop, key, None)
+        self._write({
+            'rules': [
+                {'name': 'nachtruhe', 'days': 'mo-so', 'from': '22:00', 'to': '06:00', 'keywords': ['Türöffnung'], 'max_priority': 2},
+                {'name': 'freitagnacht', 'days': ['fr'], 'from': '22:00', 'to': '06:00', 'topic': 'bereitschaft'},
+                {'name': 'feiertag', 'days': 'feiertag', 'priority': 3, 'topic': 'feiertag'},
+            ],
+            'holidays': ['12-25', '2026-04-06'],
+        })
+
+    def _write(self, data):
+        with open(os.environ['SCHEDULE_FILE'], 'w', encoding='utf-8') as handle:
+            json.dump(data, handle)
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def test_quiet_hours_cap_priority_at_night_only(self):
+        route = self.module.resolve_alarm_routing
+        self.assertEqual(route('Türöffnung akut', berlin(2026, 3, 11, 3, 0)), ('2', ''))
+        self.assertEqual(route('Türöffnung akut', berlin(2026, 3, 11, 12, 0)), ('4', ''))
+        self.assertEqual(route('B3 Wohnhaus', berlin(2026, 3, 11, 3, 0)), ('5', ''))
+
+    def test_rules_follow_wall_clock_across_dst(self):
+        route = self.module.resolve_alarm_routing
+        # 2026-03-29: clocks jump 02:00 -> 03:00; 2026-10-25: 03:00 -> 02:00.
+        for ts in (berlin(2026, 3, 29, 5, 59), berlin(2026, 10, 25, 5, 59), berlin(2026, 10, 25, 2, 30, fold=1)):
+            self.assertEqual(route('Türöffnung', ts)[0], '2')
+        for ts in (berlin(2026, 3, 29, 6, 0), berlin(2026, 10, 25, 6, 0), berlin(2026, 10, 24, 21, 59)):
+            self.assertEqual(route('Türöffnung', ts)[0], '4')
+
+    def test_overnight_rules_belong_to_their_start_day_and_holiday_rules_come_first(self):
+        route = self.module.resolve_alarm_routing
+        self.assertEqual(route('THL 1', berlin(2026, 3, 14, 5, 0)), ('3', 'bereitschaft'))  # Saturday morning
+        self.assertEqual(route('THL 1', berlin(2026, 3, 13, 5, 0)), ('3', ''))  # Friday morning
+        self.assertEqual(route('THL 1', berlin(2026, 12, 25, 12, 0)), ('3', 'feiertag'))
+        self.assertEqual(route('Türöffnung', berlin(2026, 4, 6, 23, 0)), ('3', 'feiertag'))  # Easter Monday
+
+    def test_every_day_rules_apply_on_holidays_without_a_matching_holiday_rule(self):
+        self._write({
+            'rules': [
+                {'name': 'nachtruhe', 'days': 'mo-so', 'from': '22:00', 'to': '06:00', 'keywords': ['Türöffnung'], 'max_priority': 2},
+                {'name': 'tagdienst', 'days': 'mo-fr', 'from': '06:00', 'to': '18:00', 'topic': 'tagdienst'},
+                {'name': 'feiertag-thl', 'days': 'feiertag', 'keywords': ['THL'], 'topic': 'feiertag'},
+            ],
+            'holidays': ['2026-04-06'],
+        })
+        route = self.module.resolve_alarm_routing
+        self.assertEqual(route('Türöffnung', berlin(2026, 4, 6, 23, 0)), ('2', ''))  # Easter Monday night
+        self.assertEqual(route('Türöffnung', berlin(2026, 4, 7, 3, 0)), ('2', ''))  # night started on the holiday
+        self.assertEqual(route('THL 1', berlin(2026, 4, 6, 10, 0)), ('3', 'feiertag'))
+        self.assertEqual(route('B3', berlin(2026, 4, 6, 10, 0)), ('5', ''))  # mo-fr does not apply
+        self.assertEqual(route('B3', berlin(2026, 4, 7, 10, 0)), ('5', 'tagdienst'))
+
+    def test_new_alarm_is_sent_with_the_scheduled_priority_and_topic(self):
+        sent = []
+        self.module.publish_message = lambda _state, title, msg, priority_override=None, extras=None, topic='', **_kwargs: sent.append(
+            (title, priority_override, topic))
+        self.module.save_state = lambda *_args, **_kwargs: None
+        record = self.module.AlarmRecord({'id': 3, 'title': 'Türöffnung', 'date': int(berlin(2026, 3, 13, 23, 30))})
+        self.module.ingest_alarm_records({}, [record])
+        self.module.flush_coalesced_pushes({}, force=True)
+        self.assertEqual(sent, [('Türöffnung', '2', '')])
+
+    def test_invalid_schedule_stops_startup(self):
+        self._write({'rules': [{'days': 'mo-xx'}]})
+        with self.assertRaises(SystemExit):
+            self.module.validate_runtime_config()
+
+
+if __name__ == '__main__':
+    unittest.main()
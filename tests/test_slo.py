@@ -0,0 +1,107 @@
+import importlib
+import os
+import random
+import unittest
+from unittest import mock
+
+
+class LatencySketchTests(unittest.TestCase):
+    def setUp(self):
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+
+    def test_quantiles_stay_within_relative_accuracy(self):
+        rng = random.Random(7)
+        values = sorted(rng.lognormvariate(-1.5, 1.0) for _ in range(20000))
+        sketch = self.module.LatencySketch()
+        for value in values:
+            sketch.add(value)
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q) / exact, 1.0, delta=0.021)
+        self.assertLess(len(sketch.buckets), 500)
+
+    def test_merge_matches_a_single_sketch(self):
+        one, two, both = self.module.LatencySketch(), self.module.LatencySketch(), self.module.LatencySketch()
+        for i in range(1, 200):
+            (one if i % 2 else two).add(i / 100.0)
+            both.add(i / 100.0)
+        merged = one.merge(two)
+        self.assertEqual(merged.count, 199)
+        self.assertEqual(merged.quantile(0.95), both.quantile(0.95))
+
+
+class DeliverySloTests(unittest.TestCase):
+    def setUp(self):
+        os.environ['NTFY_URL'] = 'https://primary.example'
+        os.environ['NTFY_TOPIC'] = 'topic'
+        os.environ['OUTPUT_SINKS'] = 'webhook=https://hooks.example/a'
+        os.environ['SLO_ALERT_SINK'] = 'smtp'
+        os.environ['SLO_MIN_SAMPLES'] = '4'
+        for key in ('OUTPUT_SINKS', 'SLO_ALERT_SINK', 'SLO_MIN_SAMPLES'):
+            self.addCleanup(os.environ.pop, key, None)
+        import alarm_gateway
+        self.module = importlib.reload(alarm_gateway)
+        self.addCleanup(self.module.SINKS.replace, [])
+
+    def test_alert_sink_must_be_configured(self):
+        with self.assertRaises(SystemExit):
+            self.module.validate_runtime_config()
+        self.module.SLO_ALERT_SINK = 'webhook'
+        self.module.validate_runtime_config()
+
+    def test_publish_attempts_are_tracked_per_target_and_topic(self):
+        module = self.module
+        self.addCleanup(setattr, module.requests, 'post', module.requests.post)
+        module.requests.post = mock.Mock(return_value=mock.Mock(status_code=200, headers={}))
+        module.ntfy_publish('Alarm', 'Text', topic='nacht')
+        module.ntfy_publish('Alarm', 'Text')
+        module.NTFY_RETRY_ATTEMPTS = 1
+        module.requests.post = mock.Mock(side_effect=OSError('down'))
+        with self.assertRaises(RuntimeError):
+            module.ntfy_publish('Alarm', 'Text')
+        entries = {(entry['target'], entry['topic']): entry for entry in module.DELIVERY_SLO.snapshot()}
+        self.assertEqual(entries[('https://primary.example', 'nacht')]['samples'], 1)
+        self.assertEqual(entries[('https://primary.example', 'topic')]['success_rate'], 0.5)
+        self.assertIn('alarm_gateway_ntfy_delivery_success_ratio{target="https://primary.example",topic="topic"} 0.5',
+                      module.render_metrics_text())
+
+    def test_breach_and_recovery_alert_only_the_secondary_sink(self):
+        module = self.module
+        received = []
+
+        class Recorder(module.OutputSink):
+            def send(self, event):
+                received.append((self.name, event['event'], event['title']))
+
+        module.SINKS.replace([Recorder('webhook', ''), Recorder('smtp', '')])
+        slo = module.DELIVERY_SLO
+        for _ in range(4):
+            slo.record('https://primary.example', 'topic', 9.0, True)
+        self.assertEqual(module.check_delivery_slo(), 1)
+        self.assertEqual(module.check_delivery_slo(), 0)
+        slo.reset()
+        for _ in range(4):
+            slo.record('https://primary.example', 'topic', 0.2, True)
+        slo._breached[('https://primary.example', 'topic')] = 'p95 9000 ms > 5000 ms'
+        self.assertEqual(module.check_delivery_slo(), 1)
+        self.assertTrue(module.SINKS.flush())
+        self.assertEqual(received, [
+            ('smtp', 'slo_alert', 'SLO verletzt: https://primary.example / topic'),
+            ('smtp', 'slo_recovered', 'SLO wieder erfüllt: https://primary.example / topic'),
+        ])
+        self.assertEqual(module.metrics_snapshot()['slo_alerts'], 1)
+
+    def test_old_windows_roll_off(self):
+        slo = self.module.DELIVERY_SLO
+        with mock.patch.object(self.module.time, 'monotonic', return_value=1000.0):
+            for _ in range(5):
+                slo.record('t', 'topic', 1.0, False)
+        with mock.patch.object(self.module.time, 'monotonic', return_value=1000.0 + 900):
+            self.assertEqual(slo.snapshot()[0]['samples'], 5)
+        with mock.patch.object(self.module.time, 'monotonic', return_value=1000.0 + 1800):
+            self.assertEqual(slo.snapshot()[0]['samples'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StartupTests(unittest.TestCase):
+    def test_import_does_not_load_heavy_dependencies(self):
+        env = dict(os.environ)
+        env['ALARM_GATEWAY_ENV_FILE'] = os.devnull
+        probe = "import sys, alarm_gateway; print(sorted(m for m in ('requests', 'http.server', 'subprocess') if m in sys.modules))"
+        result = subprocess.run(
+            [sys.executable, '-c', probe],
+            cwd=REPO_ROOT,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_lazy_module_forwards_attribute_writes(self):
+        import alarm_gateway
+
+        proxy = alarm_gateway._LazyModule('json')
+        original = proxy.dumps
+        try:
+            proxy.dumps = lambda *_args, **_kwargs: 'patched'
+            import json
+            self.assertEqual(json.dumps({}), 'patched')
+        finally:
+            proxy.dumps = original
+
+
+if __name__ == '__main__':
+    unittest.main()